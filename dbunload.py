@@ -8,11 +8,22 @@ abmurz@gmail.com
 
 Versions:
 1.0 - 2022-03-23 | Initial.
+1.1 - 2026-10-15 | Moved from cx_Oracle to python-oracledb.
 """
 
 # Import common libraries
+import io
 import os
+import sys
+import re
 import csv
+import gzip
+import shutil
+import functools
+import contextlib
+import queue
+import threading
+import concurrent.futures
 import argparse # you may need to install this with pip
 
 class DBUnload:
@@ -26,7 +37,16 @@ class DBUnload:
     output_quoting = csv.QUOTE_ALL
     output_escape_char = '\\'
     output_double_quote = True
-    oracle_array_size = 1000
+    output_compress = 'none'
+    output_encoding = 'utf-8'
+    oracle_array_size = 10000
+    target_fetch_bytes = 4 * 1024 * 1024
+    min_array_size = 500
+    max_array_size = 100000
+    output_buffer_size = 16 * 1024 * 1024
+    fetch_queue_size = 4
+    parallel_shards = 1
+    oracle_argument_pattern = re.compile(r':oracle_argument_([123])')
 
     def set_arguments(self, description_string):
         """
@@ -36,7 +56,7 @@ class DBUnload:
         """
         self.arguments_parser = argparse.ArgumentParser(description=description_string)
 
-    def add_argument(self, name, req, typ, help_arg):
+    def add_argument(self, name, req, typ, help_arg, choices=None):
         """
         Function to append argument supported by the script.
 
@@ -44,9 +64,20 @@ class DBUnload:
         :param req: True or False
         :param typ: Data type
         :param help_arg: Description
+        :param choices: Allowed values, any value if None
         :return: Nothing
         """
-        self.arguments_parser.add_argument(name, required=req, type=typ, help=help_arg)
+        self.arguments_parser.add_argument(name, required=req, type=typ, help=help_arg, choices=choices)
+
+    def add_flag(self, name, help_arg):
+        """
+        Function to append an on/off argument supported by the script.
+
+        :param name: Argument name
+        :param help_arg: Description
+        :return: Nothing
+        """
+        self.arguments_parser.add_argument(name, action='store_true', help=help_arg)
 
     def parse_arguments(self):
         """
@@ -55,13 +86,10 @@ class DBUnload:
         """
         self.arguments = self.arguments_parser.parse_args()
 
-    def write_to_file(self, rows, mode, multiple):
+    def set_output_format(self):
         """
-        Function to write incoming rows to output path.
+        Function to resolve output format arguments and register the CSV dialect, only once per unload.
 
-        :param rows: list to be written
-        :param mode: file open mode
-        :param multiple: multiple results at once
         :return: None
         """
 
@@ -81,18 +109,649 @@ class DBUnload:
         if self.arguments.output_double_quote is not None:
             self.output_double_quote = self.arguments.output_double_quote
 
+        if self.arguments.compress is not None:
+            self.output_compress = self.arguments.compress
+
         # Define output format as dialect
         csv.register_dialect('your_dialect', delimiter=self.output_delimiter, lineterminator=self.output_line_terminator,
                                              quoting=self.output_quoting, escapechar=self.output_escape_char,
                                              doublequote=self.output_double_quote)
 
-        # Open output path for writing, specify new line delimiter
-        with open(self.arguments.output_file, mode, newline=self.output_line_terminator) as output_file:
+    def use_row_encoder(self):
+        """
+        Function to check if the output format can be written by the hand-rolled encoder.
+
+        :return: True for the default QUOTE_ALL dialect, False when csv module must be used
+        """
+
+        # Only QUOTE_ALL with double quoting has a fixed layout simple enough to encode by hand,
+        # csv module escapes the escape char inside quoted fields only since Python 3.10,
+        # and a double quote escape char makes csv module escape quotes instead of doubling them
+        return self.output_quoting == csv.QUOTE_ALL and self.output_double_quote and \
+            sys.version_info >= (3, 10) and self.output_escape_char != '"'
+
+    def build_field_quoter(self):
+        """
+        Function to build a field quoter for the default QUOTE_ALL dialect.
+
+        :return: function quoting a single value
+        """
+
+        escape_char = self.output_escape_char
+
+        # Same rules as csv module: None is empty, escape char is escaped, quotes are doubled
+        def quote(value):
+            if value is None:
+                return '""'
+            text = str(value)
+            if escape_char:
+                text = text.replace(escape_char, escape_char + escape_char)
+            return '"' + text.replace('"', '""') + '"'
+
+        return quote
+
+    def build_row_encoder(self, column_count):
+        """
+        Function to build a row encoder for the default QUOTE_ALL dialect, specialized to the result column count.
+
+        :param column_count: number of columns of every row
+        :return: function encoding a row into a CSV line
+        """
+
+        quote = self.build_field_quoter()
+
+        # Column count is fixed for the whole unload, generate straight-line code without a loop over columns
+        fields = ", ".join("quote(row[{0}])".format(index) for index in range(column_count))
+        source = "def encode(row, quote=quote, delimiter=delimiter, line_terminator=line_terminator):\n" \
+                 "    return delimiter.join([{0}]) + line_terminator\n".format(fields)
+
+        namespace = {"quote": quote, "delimiter": self.output_delimiter,
+                     "line_terminator": self.output_line_terminator}
+        exec(source, namespace)
+
+        return namespace["encode"]
+
+    def write_rows(self, csv_writer, rows, multiple):
+        """
+        Function to write incoming rows with an already declared writer.
+
+        :param csv_writer: csv writer bound to the output file
+        :param rows: list to be written
+        :param multiple: multiple results at once
+        :return: None
+        """
+
+        # Write row(s)
+        csv_writer.writerows(rows) if multiple is True else csv_writer.writerow(rows)
+
+    def fetch_batches(self, cursor, batch_queue, stop_event):
+        """
+        Function to fetch result batches and hand them over to the writer, runs in its own thread.
+
+        :param cursor: Oracle cursor, only used by this thread
+        :param batch_queue: bounded queue shared with the writer
+        :param stop_event: set by the writer when it fails and no more batches are wanted
+        :return: None
+        """
+
+        # Bind attributes used on every batch to locals
+        fetchmany = cursor.fetchmany
+        array_size = cursor.arraysize
+        put = batch_queue.put
+
+        try:
+            while not stop_event.is_set() and (rows := fetchmany(array_size)):
+                put(rows)
+        except Exception as e:
+            # Let the writer raise fetch errors on the main thread
+            batch_queue.put(e)
+
+        # Signal end of results
+        batch_queue.put(None)
+
+    def init_session(self, connection, requested_tag):
+        """
+        Function to initialize a new pooled Oracle session, called once per physical session.
+
+        :param connection: Oracle connection
+        :param requested_tag: session tag requested on acquire, not used
+        :return: None
+        """
+
+        # Alter date format in Oracle session, this is optional, you may comment out next line if you want.
+        with connection.cursor() as cursor:
+            cursor.execute("ALTER SESSION set NLS_DATE_FORMAT = 'YYYY-MM-DD HH24:MI:SS'")
+
+    def prepare_cursor(self, connection):
+        """
+        Function to declare an Oracle cursor with fetch settings applied.
+
+        :param connection: Oracle connection
+        :return: Oracle cursor
+        """
+
+        # Declare Oracle cursor
+        cursor = connection.cursor()
+
+        # oracledb will fetch rows from Oracle N rows at a time,
+        # reducing the number of network round trips that need to be performed
+        # this also levers down memory consumption.
+        # Prefetch one row more than the array size so the first fetch is served by the execute round trip,
+        # both must be set before executing the query to take effect.
+        cursor.prefetchrows = self.oracle_array_size + 1
+        cursor.arraysize = self.oracle_array_size
+
+        return cursor
+
+    def get_batches(self, batch_queue):
+        """
+        Function to iterate over the batches handed over by the fetch thread.
+
+        :param batch_queue: bounded queue shared with the fetch thread
+        :return: generator of row batches
+        """
+
+        get = batch_queue.get
+
+        while (rows := get()) is not None:
+            if isinstance(rows, Exception):
+                raise rows
+            yield rows
+
+    def write_bytes(self, fd, data):
+        """
+        Function to write a whole buffer to a raw file descriptor.
+
+        :param fd: file descriptor
+        :param data: bytes to be written
+        :return: None
+        """
+
+        # os.write may write less than requested, keep going with the remainder without copying
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    def sync_output(self, output):
+        """
+        Function to force written data to disk, only when durability is requested.
+
+        :param output: file descriptor or file object
+        :return: None
+        """
+
+        # Flushing is otherwise left to the OS, never done per batch
+        if not self.arguments.fsync:
+            return
+
+        if isinstance(output, int):
+            os.fsync(output)
+        else:
+            output.flush()
+            os.fsync(output.fileno())
+
+    @contextlib.contextmanager
+    def open_output(self, output_path, mode):
+        """
+        Function to open output path for writing, through a compressor when requested.
+
+        :param output_path: file to dump results
+        :param mode: 'w' for text or 'wb' for bytes
+        :return: context manager of the opened output file
+        """
+
+        if self.output_compress == 'none':
+            # A large buffer lets every batch be coalesced before reaching the OS, csv module handles line terminator
+            with open(output_path, mode, buffering=self.output_buffer_size,
+                      encoding=self.output_encoding if mode == 'w' else None,
+                      newline='' if mode == 'w' else None) as output_file:
+                yield output_file
+                self.sync_output(output_file)
+            return
+
+        with open(output_path, 'wb', buffering=self.output_buffer_size) as raw_file:
+            # Fast compression levels, CPU cost stays small next to fetching rows while bytes written shrink
+            if self.output_compress == 'gzip':
+                output_file = gzip.GzipFile(fileobj=raw_file, mode='wb', compresslevel=1)
+            else:
+                # Import zstandard library only when this compression is requested
+                import zstandard
+                output_file = zstandard.ZstdCompressor(level=3).stream_writer(raw_file, closefd=False)
+
+            if mode == 'w':
+                output_file = io.TextIOWrapper(output_file, encoding=self.output_encoding, newline='')
+
+            yield output_file
+
+            # Closing the compressor writes its trailer but leaves raw file open
+            output_file.close()
+            self.sync_output(raw_file)
+
+    def write_encoded_rows(self, batches, encode, header_bytes, write):
+        """
+        Function to encode batches into a single buffer each and hand them to a write function.
+
+        :param batches: iterable of row batches
+        :param encode: row encoder
+        :param header_bytes: encoded header line to write first, None to skip it
+        :param write: function receiving encoded bytes
+        :return: number of rows written
+        """
+
+        row_count = 0
+
+        if header_bytes is not None:
+            write(header_bytes)
+
+        # Bind attributes used on every batch to locals
+        join = ''.join
+
+        for rows in batches:
+            row_count += len(rows)
+            write(join(map(encode, rows)).encode(self.output_encoding))
+
+        return row_count
+
+    def write_encoded_batches(self, batches, encode, output_path, header_bytes):
+        """
+        Function to write batches with the hand-rolled encoder straight to the output file descriptor.
+
+        :param batches: iterable of row batches
+        :param encode: row encoder
+        :param output_path: file to dump results
+        :param header_bytes: encoded header line to write first, None to skip it
+        :return: number of rows written
+        """
+
+        if self.output_compress != 'none':
+            # Compressed output goes through the compressor stream
+            with self.open_output(output_path, 'wb') as output_file:
+                return self.write_encoded_rows(batches, encode, header_bytes, output_file.write)
+
+        # Every batch is encoded once into a single buffer, no csv module or BufferedWriter in between
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            row_count = self.write_encoded_rows(batches, encode, header_bytes, functools.partial(self.write_bytes, fd))
+            self.sync_output(fd)
+        finally:
+            os.close(fd)
+
+        return row_count
+
+    def write_csv_batches(self, batches, output_path, column_names):
+        """
+        Function to write batches with the csv module writer.
+
+        :param batches: iterable of row batches
+        :param output_path: file to dump results
+        :param column_names: iterable of column names to write first, None to skip them
+        :return: number of rows written
+        """
+
+        row_count = 0
+
+        # Open output path once for the whole unload
+        with self.open_output(output_path, 'w') as output_file:
             # Declare writer
             csv_writer = csv.writer(output_file, dialect="your_dialect")
 
-            # Write row(s)
-            csv_writer.writerows(rows) if multiple is True else csv_writer.writerow(rows)
+            if column_names is not None:
+                self.write_rows(csv_writer, column_names, False)
+
+            # Bind attributes used on every batch to locals
+            writerows = csv_writer.writerows
+
+            for rows in batches:
+                row_count += len(rows)
+                writerows(rows)
+
+        return row_count
+
+    def get_error_message(self, error):
+        """
+        Function to get a printable message of an Oracle or OS error.
+
+        :param error: exception raised by a job
+        :return: error message
+        """
+
+        # Oracle errors carry their details as first argument
+        if error.args and hasattr(error.args[0], 'message'):
+            return error.args[0].message
+
+        return str(error)
+
+    def remove_outputs(self):
+        """
+        Function to remove output and part files left behind by a failed job.
+
+        :return: None
+        """
+
+        output_paths = [self.arguments.output_file]
+
+        # Part files only exist for sharded runs
+        if self.parallel_shards > 1:
+            output_paths += [self.get_part_file(shard_id) for shard_id in range(self.parallel_shards)]
+
+        for output_path in output_paths:
+            if os.path.isfile(output_path):
+                os.remove(output_path)
+
+    def describe_query(self, cursor, query):
+        """
+        Function to obtain query result description without executing it.
+
+        :param cursor: Oracle cursor
+        :param query: query text
+        :return: query description
+        """
+
+        # Parsing a query also describes its columns, query text is sent as is and no bind is needed
+        cursor.parse(query)
+
+        return cursor.description
+
+    def build_server_side_query(self, cursor, description, query):
+        """
+        Function to rewrite query so Oracle returns every row as a single CSV line in the default dialect.
+
+        :param cursor: Oracle cursor
+        :param description: original query description
+        :param query: query text
+        :return: rewritten query
+        """
+
+        # Import Oracle library
+        import oracledb
+
+        number_types = (oracledb.DB_TYPE_NUMBER, oracledb.DB_TYPE_BINARY_INTEGER,
+                        oracledb.DB_TYPE_BINARY_FLOAT, oracledb.DB_TYPE_BINARY_DOUBLE)
+        timestamp_types = (oracledb.DB_TYPE_TIMESTAMP, oracledb.DB_TYPE_TIMESTAMP_TZ, oracledb.DB_TYPE_TIMESTAMP_LTZ)
+        lob_types = (oracledb.DB_TYPE_CLOB, oracledb.DB_TYPE_NCLOB)
+
+        def literal(text):
+            return "'{0}'".format(text.replace("'", "''"))
+
+        # Same rules as the hand-rolled encoder: NULL is empty, escape char is escaped, quotes are doubled,
+        # numbers and timestamps are formatted like Python str() does on the client, dates use NLS_DATE_FORMAT
+        def quote(column):
+            field = '"{0}"'.format(column[0])
+            if column[1] in number_types:
+                # TO_CHAR drops the leading zero of decimals, .5 becomes 0.5
+                field = r"REGEXP_REPLACE(TO_CHAR({0}, 'TM9'), '^(-?)\.', '\10.')".format(field)
+            elif column[1] in timestamp_types:
+                # Fractional seconds only when not zero
+                field = "CASE WHEN TO_CHAR({0}, 'FF6') = '000000' THEN TO_CHAR({0}, 'YYYY-MM-DD HH24:MI:SS') " \
+                        "ELSE TO_CHAR({0}, 'YYYY-MM-DD HH24:MI:SS.FF6') END".format(field)
+            if self.output_escape_char:
+                field = "REPLACE({0}, {1}, {2})".format(field, literal(self.output_escape_char),
+                                                        literal(self.output_escape_char * 2))
+            return "'\"' || REPLACE({0}, '\"', '\"\"') || '\"'".format(field)
+
+        delimiter = " || {0} || ".format(literal(self.output_delimiter))
+
+        # Any CLOB column turns the whole line into a CLOB, fetch it as a string instead of a LOB locator
+        if any(column[1] in lob_types for column in description):
+            def fetch_lob_as_string(cursor, metadata):
+                if metadata.type_code in lob_types:
+                    return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+
+            cursor.outputtypehandler = fetch_lob_as_string
+
+        # Closing paren on its own line so a trailing -- comment in the query can't swallow it
+        return "SELECT {0} AS line FROM ({1}\n)".format(delimiter.join(map(quote, description)), query)
+
+    def estimate_array_size(self, description):
+        """
+        Function to estimate how many rows fit in target_fetch_bytes from result column types.
+
+        :param description: cursor description
+        :return: array size within min_array_size and max_array_size
+        """
+
+        # Import Oracle library
+        import oracledb
+
+        # Fixed size types, every other type takes its declared size
+        type_sizes = {
+            oracledb.DB_TYPE_NUMBER: 22,
+            oracledb.DB_TYPE_BINARY_INTEGER: 22,
+            oracledb.DB_TYPE_BINARY_FLOAT: 4,
+            oracledb.DB_TYPE_BINARY_DOUBLE: 8,
+            oracledb.DB_TYPE_DATE: 7,
+            oracledb.DB_TYPE_TIMESTAMP: 11,
+            oracledb.DB_TYPE_TIMESTAMP_TZ: 13,
+            oracledb.DB_TYPE_TIMESTAMP_LTZ: 11,
+            oracledb.DB_TYPE_ROWID: 18,
+        }
+
+        # Columns without a declared size (LOBs, LONG, ...) count as a full VARCHAR2
+        row_bytes = sum(type_sizes.get(column[1]) or column[3] or 4000 for column in description)
+
+        return max(self.min_array_size, min(self.max_array_size, self.target_fetch_bytes // max(row_bytes, 1)))
+
+    def write_cursor_results(self, cursor, query, output_path, header=True, parameters=None):
+        """
+        Function to execute query and dump results fetched by the cursor.
+
+        :param cursor: Oracle cursor
+        :param query: query text
+        :param output_path: file to dump results
+        :param header: write column names first
+        :param parameters: bind variables for the query
+        :return: number of rows written
+        """
+
+        # Hand-rolled encoder for the default dialect, csv module otherwise
+        use_encoder = self.use_row_encoder()
+
+        # Column types are needed before executing to size fetches and to rewrite the query server side
+        description = None
+        if self.arguments.server_side or self.arguments.oracle_array_size is None:
+            description = self.describe_query(cursor, query)
+
+        # Size every fetch from row width to about target_fetch_bytes, unless array size was given,
+        # prefetch must be set before execute to take effect
+        if self.arguments.oracle_array_size is None:
+            cursor.arraysize = self.estimate_array_size(description)
+            cursor.prefetchrows = cursor.arraysize + 1
+
+        if self.arguments.server_side:
+            # Let Oracle build every CSV line, rows come back as a single already encoded column
+            query = self.build_server_side_query(cursor, description, query)
+
+        # Execute prepared query
+        cursor.execute(query, parameters)
+
+        # Obtain result description, column names are read from it without building a list
+        if description is None:
+            description = cursor.description
+
+        # Verbose
+        print("Output file: {0}".format(output_path))
+
+        # Fetch on a separate thread so network waits overlap with writes,
+        # the bounded queue caps memory at fetch_queue_size batches
+        batch_queue = queue.Queue(maxsize=self.fetch_queue_size)
+        stop_event = threading.Event()
+        producer = threading.Thread(target=self.fetch_batches, args=(cursor, batch_queue, stop_event), daemon=True)
+        producer.start()
+
+        try:
+            row_count = self.write_batches(self.get_batches(batch_queue), description, output_path, header,
+                                           use_encoder)
+        finally:
+            # When writing fails, stop the fetch thread and drain the queue so it never stays blocked,
+            # cursor must be free before it is closed
+            stop_event.set()
+            while producer.is_alive():
+                try:
+                    batch_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
+
+        return row_count
+
+    def write_batches(self, batches, description, output_path, header, use_encoder):
+        """
+        Function to write fetched batches with the hand-rolled encoder or csv module.
+
+        :param batches: iterable of row batches
+        :param description: result description
+        :param output_path: file to dump results
+        :param header: write column names first
+        :param use_encoder: True to use the hand-rolled encoder
+        :return: number of rows written
+        """
+
+        if use_encoder:
+            if header is True:
+                # Header is encoded to its final bytes once, before any row arrives
+                quote = self.build_field_quoter()
+                header_bytes = (self.output_delimiter.join(quote(column[0]) for column in description) +
+                                self.output_line_terminator).encode(self.output_encoding)
+            else:
+                header_bytes = None
+
+            if self.arguments.server_side:
+                # Lines are already encoded by Oracle, only the line terminator is missing
+                def encode(row, line_terminator=self.output_line_terminator):
+                    return row[0] + line_terminator
+            else:
+                encode = self.build_row_encoder(len(description))
+
+            return self.write_encoded_batches(batches, encode, output_path, header_bytes)
+
+        return self.write_csv_batches(batches, output_path,
+                                      (column[0] for column in description) if header is True else None)
+
+    def get_part_file(self, shard_id):
+        """
+        Function to build the output path of one shard.
+
+        :param shard_id: shard number
+        :return: part file path
+        """
+        return "{0}.part{1:02d}".format(self.arguments.output_file, shard_id)
+
+    def write_shard(self, pool, query, shard_id, shard_count, header):
+        """
+        Function to dump one ROWID hash bucket of the query on its own connection, runs in a worker thread.
+
+        :param pool: Oracle connection pool
+        :param query: query text
+        :param shard_id: shard number
+        :param shard_count: total number of shards
+        :param header: write column names first
+        :return: number of rows written
+        """
+
+        # Keep only rows whose ROWID hashes to this shard, query must select from a single table,
+        # closing paren goes on its own line so a trailing -- comment in the query can't swallow it
+        shard_query = "SELECT /*+ PARALLEL */ * FROM ({0}\n) WHERE MOD(ORA_HASH(ROWID), :shard_count) = :shard_id" \
+            .format(query)
+
+        # Connections can't execute from several threads at once, every shard acquires its own
+        connection = pool.acquire()
+        try:
+            cursor = self.prepare_cursor(connection)
+            try:
+                return self.write_cursor_results(cursor, shard_query, self.get_part_file(shard_id), header,
+                                                 {"shard_count": shard_count, "shard_id": shard_id})
+            finally:
+                # Close Oracle cursor
+                cursor.close()
+        finally:
+            # Release connection to the pool, also when the shard fails
+            connection.close()
+
+    def concatenate_parts(self, part_files):
+        """
+        Function to concatenate part files into output file and remove them.
+
+        :param part_files: list of part file paths, in order
+        :return: None
+        """
+
+        with open(self.arguments.output_file, 'wb') as output_file:
+            for part_file in part_files:
+                with open(part_file, 'rb') as input_file:
+                    # Copy in kernel space, no data goes through Python
+                    offset = 0
+                    size = os.fstat(input_file.fileno()).st_size
+                    try:
+                        # Anything copied in Python must reach the file before the kernel appends to it
+                        output_file.flush()
+                        while offset < size:
+                            offset += os.sendfile(output_file.fileno(), input_file.fileno(), offset, size - offset)
+                    except OSError:
+                        # sendfile only targets regular files on Linux (sockets on macOS), copy the rest in Python
+                        input_file.seek(offset)
+                        shutil.copyfileobj(input_file, output_file)
+
+                os.remove(part_file)
+
+            self.sync_output(output_file)
+
+    def write_sharded_results(self, pool, query):
+        """
+        Function to dump the query split in ROWID hash shards, each one fetched and written in parallel.
+
+        :param pool: Oracle connection pool
+        :param query: query text
+        :return: number of rows written
+        """
+
+        shard_count = self.parallel_shards
+        part_files = [self.get_part_file(shard_id) for shard_id in range(shard_count)]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=shard_count) as executor:
+            # Kept parts are standalone files with their own header, concatenated ones only need the first
+            futures = [executor.submit(self.write_shard, pool, query, shard_id, shard_count,
+                                       self.arguments.keep_parts or shard_id == 0)
+                       for shard_id in range(shard_count)]
+            row_count = sum(future.result() for future in futures)
+
+        if not self.arguments.keep_parts:
+            self.concatenate_parts(part_files)
+
+        return row_count
+
+    def write_pandas_results(self, connection, query):
+        """
+        Function to fetch query results as DataFrame chunks and dump them with pandas CSV writer.
+
+        :param connection: Oracle connection
+        :param query: query text
+        :return: number of rows written
+        """
+
+        # Import pandas library only when this engine is requested
+        import pandas
+
+        # Verbose
+        print("Output file: {0}".format(self.arguments.output_file))
+
+        row_count = 0
+        first = True
+
+        with self.open_output(self.arguments.output_file, 'w') as output_file:
+            # read_sql keeps streaming semantics with chunksize, every chunk is written by the C csv writer
+            try:
+                for chunk_df in pandas.read_sql(query, connection, chunksize=self.oracle_array_size):
+                    chunk_df.to_csv(output_file, sep=self.output_delimiter, header=first, index=False,
+                                    quoting=self.output_quoting, escapechar=self.output_escape_char,
+                                    doublequote=self.output_double_quote,
+                                    lineterminator=self.output_line_terminator)
+                    row_count += len(chunk_df)
+                    first = False
+            except pandas.io.sql.DatabaseError as e:
+                # Raise the Oracle error wrapped by pandas
+                raise e.__cause__ or e
+
+        return row_count
 
     def set_oracle_optional_args(self, query):
         """
@@ -102,17 +761,16 @@ class DBUnload:
         :return: modified query with arguments applied
         """
 
-        # if arg1 is valid, replace it
-        if self.arguments.oracle_argument_1 is not None:
-            query = query.replace(":oracle_argument_1", self.arguments.oracle_argument_1)
+        # Map argument number to its value, None when not given
+        arguments = {number: getattr(self.arguments, "oracle_argument_{0}".format(number)) for number in '123'}
 
-        # if arg2 is valid, replace it
-        if self.arguments.oracle_argument_2 is not None:
-            query = query.replace(":oracle_argument_2", self.arguments.oracle_argument_2)
+        # if arg is valid, replace it, otherwise leave it untouched
+        def replace(match):
+            value = arguments[match.group(1)]
+            return value if value is not None else match.group(0)
 
-        # if arg3 is valid, replace it
-        if self.arguments.oracle_argument_3 is not None:
-            query = query.replace(":oracle_argument_3", self.arguments.oracle_argument_3)
+        # Replace all arguments in a single pass over the query text
+        query = self.oracle_argument_pattern.sub(replace, query)
 
         # Verbose
         print("Oracle query:\n{0}".format(query))
@@ -120,77 +778,168 @@ class DBUnload:
         # return modified query
         return query
 
-    def get_oracle_results(self):
+    def create_oracle_pool(self):
         """
-        Function to prepare/execute query and returns results.
+        Function to resolve Oracle and output settings once and create the connection pool.
 
-        :return: None
+        :return: Oracle connection pool
         """
 
-        # Import Oracle library
-        import cx_Oracle
+        # Import Oracle library, python-oracledb runs in thin mode unless Oracle Client is initialized
+        import oracledb
+
+        # Read AIM_PSWD from environment to use that Oracle connection string
+        con_string = os.environ.get('AIM_PSWD')
+
+        if self.arguments.oracle_array_size is not None:
+            self.oracle_array_size = self.arguments.oracle_array_size
+
+        # Defaults apply to every cursor opened afterwards, including the ones pandas opens internally
+        oracledb.defaults.arraysize = self.oracle_array_size
+        oracledb.defaults.prefetchrows = self.oracle_array_size + 1
+
+        if self.arguments.parallel_shards is not None:
+            self.parallel_shards = self.arguments.parallel_shards
+
+        # Resolve output format and register dialect once
+        self.set_output_format()
+
+        # Server side lines are only built in the default dialect
+        if self.arguments.server_side and not self.use_row_encoder():
+            print("--server_side only supports QUOTE_ALL quoting with double quote")
+            exit(1)
+
+        # Create Oracle connection pool, one session per shard, ALTER SESSION runs once per session
+        return oracledb.create_pool(dsn=con_string, min=self.parallel_shards, max=self.parallel_shards, increment=0,
+                                    session_callback=self.init_session)
+
+    def unload(self, pool):
+        """
+        Function to prepare/execute the query of SQL input file and dump its results to output file.
+
+        :param pool: Oracle connection pool
+        :return: None
+        """
 
         # Read input file
         with open(self.arguments.sql_file, 'r') as fileInput:
             # Replace optional arguments on the fly
             query = self.set_oracle_optional_args(fileInput.read())
 
-        # Read AIM_PSWD from environment to use that Oracle connection string
-        con_string = os.environ.get('AIM_PSWD')
+        if self.parallel_shards > 1:
+            # Dump results split in shards, each one on its own connection
+            row_count = self.write_sharded_results(pool, query)
+        else:
+            # Acquire Oracle connection
+            connection = pool.acquire()
+            try:
+                # Dump results with pandas when requested, it opens its own cursor, with the cursor otherwise
+                if self.arguments.use_pandas:
+                    row_count = self.write_pandas_results(connection, query)
+                else:
+                    # Declare Oracle cursor
+                    cursor = self.prepare_cursor(connection)
+                    try:
+                        row_count = self.write_cursor_results(cursor, query, self.arguments.output_file)
+                    finally:
+                        # Close Oracle cursor
+                        cursor.close()
+            finally:
+                # Release Oracle connection, also when the job fails
+                connection.close()
 
-        # Create Oracle connection
-        connection = cx_Oracle.connect(con_string)
+        # Verbose
+        print("Rows unloaded: {:,}".format(row_count))
 
-        # Declare Oracle cursor
-        cursor = connection.cursor()
+        if self.parallel_shards > 1 and self.arguments.keep_parts:
+            for shard_id in range(self.parallel_shards):
+                print("Part file size: {0} {1:,} bytes".format(self.get_part_file(shard_id),
+                                                            os.path.getsize(self.get_part_file(shard_id))))
+        else:
+            print("Output file size: {:,} bytes".format(os.path.getsize(self.arguments.output_file)))
 
-        # Alter date format in Oracle session, this is optional, you may comment out next line if you want.
-        cursor.execute("ALTER SESSION set NLS_DATE_FORMAT = 'YYYY-MM-DD HH24:MI:SS'")
+    def check_files(self):
+        """
+        Function to check SQL input file exists and output file can be written.
 
-        if self.arguments.oracle_array_size is not None:
-            self.oracle_array_size = self.arguments.oracle_array_size
+        :return: error message, None when both files are valid
+        """
 
-        # cx_Oracle will fetch rows from Oracle N rows at a time,
-        # reducing the number of network round trips that need to be performed
-        # this also levers down memory consumption.
-        cursor.arraysize = self.oracle_array_size
+        # Check if SQL input file exists
+        if not os.path.isfile(self.arguments.sql_file):
+            return "SQL input file doesn't exist"
 
-        # Execute prepared query
+        # Create output file to see if path exists and we can write, without spawning a shell
         try:
-            cursor.execute(query)
-        except cx_Oracle.DatabaseError as e:
-            error, = e.args
-            print(error.message)
-            exit(1)
+            fd = os.open(self.arguments.output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            os.close(fd)
 
-        # Verbose
-        print("Output file: {0}".format(self.arguments.output_file))
+            # Kept parts are the only outputs, don't leave an empty output file next to them
+            if self.arguments.keep_parts and self.arguments.parallel_shards is not None \
+                    and self.arguments.parallel_shards > 1:
+                os.remove(self.arguments.output_file)
+        except OSError:
+            return "Invalid output file path or no write permissions"
+
+        return None
+
+    def get_oracle_results(self):
+        """
+        Function to prepare/execute query and returns results.
 
-        # Obtain result column names
-        column_names = [column[0] for column in cursor.description]
+        :return: None
+        """
 
-        # Write column names
-        self.write_to_file(column_names, 'w', False)
+        pool = self.create_oracle_pool()
 
-        row_count = 0
+        try:
+            self.unload(pool)
+        finally:
+            # Close Oracle connection pool
+            pool.close()
 
-        # Iterate over the results N times to avoid high memory consumption
-        while True:
-            rows = cursor.fetchmany(self.oracle_array_size)
-            if not rows:
-                break
-            row_count = row_count + len(rows)
-            self.write_to_file(rows, 'a', True)
+    def run_server_mode(self):
+        """
+        Function to unload every job read from stdin in this same process, reusing one connection pool.
+        Each line is a job with SQL input file and output file separated by whitespace,
+        a failed job is reported and skipped.
 
-        # Close Oracle cursor
-        cursor.close()
+        :return: None
+        """
 
-        # Close Oracle connection
-        connection.close()
+        # Oracle client, settings and sessions are loaded once for all jobs
+        pool = self.create_oracle_pool()
 
-        # Verbose
-        print("Rows unloaded: {:,}".format(row_count))
-        print("Output file size: {:,} bytes".format(os.path.getsize(self.arguments.output_file)))
+        try:
+            for line in sys.stdin:
+                fields = line.split()
+
+                # Skip blank lines
+                if not fields:
+                    continue
+
+                if len(fields) != 2:
+                    print("Invalid job, expected SQL input file and output file: {0}".format(line.strip()))
+                    continue
+
+                # Every job reuses the parsed arguments with its own files
+                self.arguments.sql_file, self.arguments.output_file = fields
+
+                error = self.check_files()
+                if error is not None:
+                    print(error)
+                    continue
+
+                try:
+                    self.unload(pool)
+                except Exception as e:
+                    # Report and clean up the failed job, then go on with the next one,
+                    # KeyboardInterrupt is not an Exception and still stops the server
+                    print("Job failed: {0}".format(self.get_error_message(e)))
+                    self.remove_outputs()
+        finally:
+            # Close Oracle connection pool
+            pool.close()
 
 def main():
     """
@@ -205,11 +954,11 @@ def main():
     # Declare arguments text
     dbunload.set_arguments("Parameters to generate CSV file:")
 
-    # Declare mandatory query file argument
-    dbunload.add_argument("--sql_file", True, str, "SQL input file")
+    # Declare query file argument, mandatory unless running in server mode
+    dbunload.add_argument("--sql_file", False, str, "SQL input file")
 
-    # Declare mandatory output folder argument
-    dbunload.add_argument("--output_file", True, str, "Output file to dump data")
+    # Declare output folder argument, mandatory unless running in server mode
+    dbunload.add_argument("--output_file", False, str, "Output file to dump data")
 
     # Declare optional text argument 1
     dbunload.add_argument("--oracle_argument_1", False, str, "Oracle text argument 1")
@@ -221,7 +970,7 @@ def main():
     dbunload.add_argument("--oracle_argument_3", False, str, "Oracle text argument 3")
 
     # Declare optional
-    dbunload.add_argument("--oracle_array_size", False, int, "Oracle array size")
+    dbunload.add_argument("--oracle_array_size", False, int, "Oracle array size (default estimated from row width)")
 
     # Declare optional
     dbunload.add_argument("--output_delimiter", False, str, "Output format delimiter")
@@ -238,24 +987,76 @@ def main():
     # Declare optional
     dbunload.add_argument("--output_double_quote", False, bool, "Output format double quote (True/False)")
 
+    # Declare optional
+    dbunload.add_argument("--compress", False, str, "Output compression, parts stay valid when concatenated",
+                          ["none", "gzip", "zstd"])
+
+    # Declare optional
+    dbunload.add_flag("--use_pandas", "Fetch and write through pandas read_sql/to_csv (pandas must be installed)")
+
+    # Declare optional
+    dbunload.add_argument("--parallel_shards", False, int,
+                          "Split query in N ROWID hash shards unloaded in parallel (query must select from one table)")
+
+    # Declare optional
+    dbunload.add_flag("--keep_parts", "Keep parallel shards as separate part files instead of concatenating them")
+
+    # Declare optional
+    dbunload.add_flag("--server_side",
+                      "Build CSV lines in Oracle, lines without CLOB columns are limited to VARCHAR2 max size, "
+                      "floats with more than 15 digits or in exponent notation may differ from the default output")
+
+    # Declare optional
+    dbunload.add_flag("--server_mode", "Read jobs from stdin, one 'sql_file output_file' per line, in a single process")
+
+    # Declare optional
+    dbunload.add_flag("--fsync", "Flush and fsync output file once at the end of the unload")
+
     # Parse configured arguments
     dbunload.parse_arguments()
 
-    # Check if SQL input file exists
-    if not os.path.isfile(dbunload.arguments.sql_file):
-        print("SQL input file doesn't exist")
+    # Every shard needs at least one connection
+    if dbunload.arguments.parallel_shards is not None and dbunload.arguments.parallel_shards < 1:
+        print("--parallel_shards must be 1 or greater")
         exit(1)
 
-    # Touch output file to see if path exists and we can write
-    os.system("touch {0}".format(dbunload.arguments.output_file))
+    # pandas engine fetches through a single connection
+    if dbunload.arguments.use_pandas and dbunload.arguments.parallel_shards is not None \
+            and dbunload.arguments.parallel_shards > 1:
+        print("--use_pandas can't be combined with --parallel_shards")
+        exit(1)
+
+    # pandas engine formats rows itself
+    if dbunload.arguments.use_pandas and dbunload.arguments.server_side:
+        print("--use_pandas can't be combined with --server_side")
+        exit(1)
+
+    # Unload every job from stdin with the same process and connection pool, failed jobs don't stop it
+    if dbunload.arguments.server_mode:
+        dbunload.run_server_mode()
+        return
 
-    # Check if touched file exists
-    if not os.path.isfile(dbunload.arguments.output_file):
-        print("Invalid output file path or no write permissions")
+    # Check mandatory files
+    if dbunload.arguments.sql_file is None or dbunload.arguments.output_file is None:
+        print("--sql_file and --output_file are required")
         exit(1)
 
-    # Invoke get_oracle_results
-    dbunload.get_oracle_results()
+    # Check if SQL input file exists and output file can be written
+    error = dbunload.check_files()
+    if error is not None:
+        print(error)
+        exit(1)
+
+    # Import Oracle library
+    import oracledb
+
+    # Invoke get_oracle_results, any Oracle error ends the run
+    try:
+        dbunload.get_oracle_results()
+    except oracledb.DatabaseError as e:
+        print(dbunload.get_error_message(e))
+        dbunload.remove_outputs()
+        exit(1)
 
 # Route script to execute main function
 if __name__ == '__main__':
@@ -0,0 +1,88 @@
+"""
+Tests for the hand-rolled row encoder, run with: python -m unittest test_dbunload
+"""
+
+import io
+import csv
+import decimal
+import datetime
+import argparse
+import unittest
+
+from dbunload import DBUnload
+
+
+class RowEncoderTest(unittest.TestCase):
+    """
+    Class to check the hand-rolled encoder writes the same text as csv module for the registered dialect.
+    """
+
+    def get_dbunload(self, **output_format):
+        """
+        Function to build a DBUnload with output format arguments resolved.
+
+        :param output_format: output format arguments, defaults for the rest
+        :return: DBUnload instance
+        """
+
+        arguments = dict(output_delimiter=None, output_line_terminator=None, output_quoting=None,
+                         output_escape_char=None, output_double_quote=None, compress=None)
+        arguments.update(output_format)
+
+        dbunload = DBUnload()
+        dbunload.arguments = argparse.Namespace(**arguments)
+        dbunload.set_output_format()
+
+        return dbunload
+
+    def assert_same_as_csv(self, dbunload):
+        """
+        Function to compare the encoder output with csv module on tricky sample rows.
+
+        :param dbunload: DBUnload instance with output format resolved
+        :return: None
+        """
+
+        # Quotes, escape char, NULL, embedded delimiter and line breaks, and common Oracle fetched types
+        rows = [
+            ('a"b', '""', 'c\\d', None, ''),
+            ('x' + dbunload.output_delimiter + 'y', 'l\nm', 'r\r\nn', dbunload.output_line_terminator, ' '),
+            (1, -2.5, decimal.Decimal('0.50'), datetime.datetime(2022, 3, 23, 10, 30, 5), True),
+        ]
+
+        if dbunload.output_escape_char:
+            rows.append((dbunload.output_escape_char, dbunload.output_escape_char + '"',
+                         '"' + dbunload.output_escape_char, 'e' + dbunload.output_escape_char * 2,
+                         datetime.date(2022, 3, 23)))
+
+        expected = io.StringIO()
+        csv.writer(expected, dialect="your_dialect").writerows(rows)
+
+        encode = dbunload.build_row_encoder(5)
+
+        self.assertEqual(expected.getvalue(), ''.join(map(encode, rows)))
+
+    def test_default_dialect(self):
+        dbunload = self.get_dbunload()
+
+        self.assertTrue(dbunload.use_row_encoder())
+        self.assert_same_as_csv(dbunload)
+
+    def test_custom_dialects(self):
+        for output_format in [dict(output_delimiter=','), dict(output_delimiter='\t', output_line_terminator='\r\n'),
+                              dict(output_escape_char='#'), dict(output_escape_char='|')]:
+            with self.subTest(**output_format):
+                dbunload = self.get_dbunload(**output_format)
+
+                self.assertTrue(dbunload.use_row_encoder())
+                self.assert_same_as_csv(dbunload)
+
+    def test_csv_module_dialects(self):
+        for output_format in [dict(output_escape_char='"'), dict(output_quoting=csv.QUOTE_MINIMAL),
+                              dict(output_double_quote=False)]:
+            with self.subTest(**output_format):
+                self.assertFalse(self.get_dbunload(**output_format).use_row_encoder())
+
+
+if __name__ == '__main__':
+    unittest.main()